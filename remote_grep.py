@@ -3,7 +3,7 @@
 """
 Run a grep search over SSH on multiple Solaris hosts and optionally download matching files.
 
-usage: remote_grep.py [-h] --config CONFIG --search SEARCH --path PATH [--download {0,1}] [--dest DEST] [--parallel PARALLEL] [--timeout TIMEOUT]
+usage: remote_grep.py [-h] --config CONFIG --search SEARCH --path PATH [--download {0,1}] [--dest DEST] [--parallel PARALLEL] [--sftp-requests SFTP_REQUESTS] [--sftp-chunk SFTP_CHUNK] [--timeout TIMEOUT]
 
 Run grep on Solaris hosts over SSH and optionally download matching files.
 
@@ -14,7 +14,11 @@ options:
   --path PATH          Remote path or glob pattern (e.g., /var/.../ssnnMAB0076*)
   --download {0,1}     If 1, download matching files.
   --dest DEST          Local destination root for downloads (default: downloads).
-  --parallel PARALLEL  Number of parallel SSH sessions (default: 4).
+  --parallel PARALLEL  Number of parallel SSH sessions (default: one per host, capped at 32).
+  --sftp-requests SFTP_REQUESTS
+                       Max concurrent SFTP prefetch requests per file (default: 64).
+  --sftp-chunk SFTP_CHUNK
+                       SFTP read request size in bytes (default: 1 MiB; use 32768 if the server rejects large reads).
   --timeout TIMEOUT    Per-host SSH/command timeout seconds (default: 120).
 
 Usage:
@@ -27,59 +31,283 @@ Usage:
 """
 
 import argparse
+import io
 import json
 import os
 import sys
 import socket
+import threading
+import time
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
-from typing import List, Tuple
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
 import shlex
+import tarfile
+
+# Fail with a clear message instead of an opaque TypeError later:
+# dataclass(slots=True) needs 3.10, and the SFTP prefetch cap needs
+# paramiko 3.3.
+if sys.version_info < (3, 10):
+    sys.exit("remote_grep requires Python 3.10 or newer.")
+
 import paramiko
+import paramiko.sftp_file
+
+try:
+    _paramiko_version = tuple(int(part) for part in paramiko.__version__.split(".")[:2])
+except ValueError:
+    _paramiko_version = (0, 0)
+if _paramiko_version < (3, 3):
+    sys.exit("remote_grep requires paramiko 3.3 or newer.")
+
+try:
+    import orjson  # ~3-5x faster than stdlib json; worthwhile on huge inventories
+except ImportError:
+    orjson = None
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module
+    resource = None
 
 # ----------------------------- Data classes -----------------------------
 
-@dataclass
+# slots: no per-instance __dict__, which matters at 10k+ hosts and makes
+# attribute access a fixed-offset lookup. frozen: hashable, so a HostConfig
+# can key dicts like the connection pool.
+@dataclass(slots=True, frozen=True)
 class HostConfig:
     hostname: str
     ip: str
     username: str
-    password: str
+    # repr=False keeps the password out of logs and tracebacks if a host list
+    # is ever printed.
+    password: str = field(repr=False)
     port: int = 22
 
+# ----------------------------- Host cache -----------------------------
+
+# Side-file remembering, per hostname, the last IP we resolved and when we
+# last authenticated successfully. Entries within the TTL let a config without
+# an explicit "ip" skip DNS on the next run and give retries a fast way to
+# know a host was recently reachable.
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "remote_grep.json")
+CACHE_TTL = 86400  # seconds a cached entry stays trusted
+
+_host_cache: dict = {}
+_host_cache_lock = threading.Lock()
+_host_cache_dirty = False
+
+def load_host_cache() -> None:
+    try:
+        with open(CACHE_PATH, "r", encoding="utf-8") as f:
+            _host_cache.update(json.load(f))
+    except (OSError, ValueError):
+        pass  # missing or corrupt cache is the same as no cache
+
+def cached_ip(hostname: str) -> Optional[str]:
+    entry = _host_cache.get(hostname)
+    if entry and time.time() - entry.get("last_ok_ts", 0) < CACHE_TTL:
+        return entry.get("ip")
+    return None
+
+def record_host_ok(host: HostConfig, banner: str) -> None:
+    global _host_cache_dirty
+    with _host_cache_lock:
+        _host_cache[host.hostname] = {
+            "ip": host.ip,
+            "last_ok_ts": time.time(),
+            "banner": banner,
+        }
+        _host_cache_dirty = True
+
+def save_host_cache() -> None:
+    if not _host_cache_dirty:
+        return
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        with open(CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(_host_cache, f)
+    except OSError:
+        pass  # cache is best-effort; never fail the run over it
+
 # ----------------------------- SSH logic -----------------------------
 
 def build_list_command(search: str, path_glob: str) -> str:
     """
     Build a remote command that lists files containing the search string.
-    - grep -i  : case-insensitive 
-    - grep -l  : print only names of files with matches
-    - '--'     : end of options, protects paths starting with '-'
-    - LC_ALL=C : predictable locale
-    We intentionally DO NOT shell-quote path_glob so the wildcard expands on remote side.
+    The glob is split into directory + basename pattern and matched by find,
+    not by shell expansion: thousands of matching files would overflow a
+    single argv (E2BIG), while find streams names to xargs in batches of 500
+    and grep starts on the first batch while find is still walking.
+    ripgrep is preferred when the remote has it: its DFA-based engine searches
+    large log directories several times faster than grep. Both are invoked
+    with the same semantics:
+    - -F        : fixed-string match, much faster than regex
+    - -i        : case-insensitive
+    - -l        : print only names of files with matches
+    - '--'      : end of options, protects paths starting with '-'
+    - LC_ALL=C  : predictable locale
+    The sh -c wrapper neutralises the no-match exit 1 per batch (xargs would
+    otherwise collapse it into 123, indistinguishable from a real grep
+    error), and pipefail surfaces a failing find stage (bad directory, typo'd
+    path) instead of letting it exit 0 with empty output — so a non-zero exit
+    from this command genuinely means failure.
     """
-    inner = f"LC_ALL=C grep -iln -- {shlex.quote(search)} {path_glob}"
+    directory, pattern = os.path.split(path_glob)
+    if not directory:
+        directory = "."
+    if not pattern:
+        pattern = "*"
+    quoted_search = shlex.quote(search)
+    inner = (
+        f"set -o pipefail;"
+        f" find {shlex.quote(directory)} -maxdepth 1 -type f -name {shlex.quote(pattern)} -print0"
+        f" | if command -v rg >/dev/null 2>&1;"
+        f" then xargs -0 -r -n 500 sh -c 'rg -Fil -- \"$0\" \"$@\" || test $? -eq 1' {quoted_search};"
+        f" else LC_ALL=C xargs -0 -r -n 500 sh -c 'grep -Fil -- \"$0\" \"$@\" || test $? -eq 1' {quoted_search}; fi"
+    )
     return "bash -c " + shlex.quote(inner)
 
-def connect_ssh(host: HostConfig, timeout: int) -> paramiko.SSHClient:
+def build_download_command(search: str, path_glob: str) -> str:
+    """
+    Build a remote command that greps and immediately tars the matching files
+    to stdout, fusing the list and transfer steps into a single exec: a
+    matching host costs one round trip and one continuous channel instead of
+    a listing pass followed by per-file transfers.
+    Matched names flow NUL-delimited (--null output) from the search into
+    'xargs -0 tar', so arbitrary filenames survive; tar itself strips the
+    leading '/', keeping member names relative as in tar_download_files.
+    """
+    directory, pattern = os.path.split(path_glob)
+    if not directory:
+        directory = "."
+    if not pattern:
+        pattern = "*"
+    quoted_search = shlex.quote(search)
+    # pipefail: the exit status must reflect a failing search stage, not just
+    # the trailing tar (which exits 0 on an empty stream). -r on the search
+    # xargs keeps an empty find result from running grep/rg against stdin,
+    # and the sh -c wrapper neutralises the no-match exit 1 (a no-match batch
+    # is not a failure), so any surviving non-zero status is a genuine error.
+    inner = (
+        f"set -o pipefail;"
+        f" find {shlex.quote(directory)} -maxdepth 1 -type f -name {shlex.quote(pattern)} -print0"
+        f" | if command -v rg >/dev/null 2>&1;"
+        f" then xargs -0 -r -n 500 sh -c 'rg -Fil0 -- \"$0\" \"$@\" || test $? -eq 1' {quoted_search};"
+        f" else LC_ALL=C xargs -0 -r -n 500 sh -c 'grep -FilZ -- \"$0\" \"$@\" || test $? -eq 1' {quoted_search}; fi"
+        f" | xargs -0 -r tar -cf -"
+    )
+    return "bash -c " + shlex.quote(inner)
+
+# Socket buffer size handed to the kernel before Paramiko sees the socket.
+# Default SO_SNDBUF/SO_RCVBUF (64-256 KB) cap throughput on high
+# bandwidth-delay-product links; 32 MB lets the window of a fast WAN stay full.
+SOCKET_BUFFER_SIZE = 32 * 1024 * 1024
+
+# Concurrent SFTP channels per host in the per-file fallback download path.
+SFTP_WORKERS = 8
+
+# Pool of live SSH clients keyed by (ip, username, port), so several logical
+# hostnames pointing at one box, and the grep/SFTP/tar steps of a single host,
+# all share one authenticated transport instead of re-paying the handshake.
+_POOL: "OrderedDict[Tuple[str, str, int], paramiko.SSHClient]" = OrderedDict()
+_POOL_LOCK = threading.Lock()
+_POOL_MAX = 128
+# Clients evicted from the pool may still be mid-transfer on another thread,
+# so eviction only parks them here; close_all_connections() drains them.
+_POOL_RETIRED: List[paramiko.SSHClient] = []
+
+def _dial_ssh(host: HostConfig, timeout: int) -> paramiko.SSHClient:
+    # Pre-create the socket ourselves so we can tune it before Paramiko wraps
+    # it: big kernel buffers keep more data in flight per round-trip, and
+    # TCP_NODELAY avoids Nagle stalls on small SSH channel messages.
+    sock = socket.create_connection((host.ip, host.port), timeout=timeout)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+
+    transport = paramiko.Transport(sock)
+    transport.banner_timeout = timeout
+    transport.auth_timeout = timeout
+    # Paramiko's 64 KB default channel window throttles bulk transfers to well
+    # under 1 MB/s; open it up and push rekeying far out so a multi-GB download
+    # never stalls waiting for window credit or a mid-stream renegotiation.
+    transport.default_window_size = 2147483647
+    transport.packetizer.REKEY_BYTES = pow(2, 40)
+    transport.packetizer.REKEY_PACKETS = pow(2, 40)
+    try:
+        transport.connect(username=host.username, password=host.password)
+    except Exception:
+        try:
+            transport.close()
+        except Exception:
+            pass
+        raise
+
     client = paramiko.SSHClient()
     client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    client.connect(
-        hostname=host.ip,
-        port=host.port,
-        username=host.username,
-        password=host.password,
-        allow_agent=False,
-        look_for_keys=False,
-        timeout=timeout,
-        banner_timeout=timeout,
-        auth_timeout=timeout,
-    )
+    client._transport = transport
+    record_host_ok(host, transport.remote_version)
     return client
 
-def run_list_on_host(host: HostConfig, search: str, path_glob: str, timeout: int = 120) -> Tuple[str, int, List[str], str]:
+def connect_ssh(host: HostConfig, timeout: int) -> paramiko.SSHClient:
+    """
+    Return a live SSH client for the host, reusing a pooled connection when one
+    exists and is still active; otherwise dial, pool and return a fresh one.
+    """
+    key = (host.ip, host.username, host.port)
+    with _POOL_LOCK:
+        client = _POOL.get(key)
+        if client is not None:
+            transport = client.get_transport()
+            if transport is not None and transport.is_active():
+                _POOL.move_to_end(key)
+                return client
+            del _POOL[key]
+
+    client = _dial_ssh(host, timeout)
+    with _POOL_LOCK:
+        existing = _POOL.get(key)
+        if existing is not None:
+            # Lost a dial race: keep the pooled client, discard ours.
+            transport = existing.get_transport()
+            if transport is not None and transport.is_active():
+                try:
+                    client.close()
+                except Exception:
+                    pass
+                _POOL.move_to_end(key)
+                return existing
+        _POOL[key] = client
+        _POOL.move_to_end(key)
+        while len(_POOL) > _POOL_MAX:
+            # Never close on eviction: the evicted client may still be
+            # serving a download on another thread.
+            _, evicted = _POOL.popitem(last=False)
+            _POOL_RETIRED.append(evicted)
+    return client
+
+def close_all_connections() -> None:
+    """Close and drop every pooled or retired SSH client; called from main's cleanup."""
+    with _POOL_LOCK:
+        clients = list(_POOL.values()) + _POOL_RETIRED
+        _POOL.clear()
+        _POOL_RETIRED.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+def run_list_on_host(host: HostConfig, search: str, path_glob: str, timeout: int = 120) -> Tuple[str, int, List[str], str, Optional[paramiko.SSHClient]]:
     """
-    Run grep -l on the remote host; return (hostname, exit_code, matching_paths[], stderr_text).
+    Run grep -l on the remote host; return (hostname, exit_code, matching_paths[], stderr_text, client).
+    The client is left open so a subsequent SFTP download can reuse the same
+    authenticated transport instead of paying a second handshake; it is None on
+    connection failure. Clients live in the module pool and are closed by
+    close_all_connections().
     grep exit codes:
       0 -> matches found
       1 -> no matches
@@ -88,66 +316,236 @@ def run_list_on_host(host: HostConfig, search: str, path_glob: str, timeout: int
     try:
         client = connect_ssh(host, timeout)
     except (paramiko.AuthenticationException, paramiko.SSHException, socket.error) as e:
-        return (host.hostname, 255, [], f"SSH/Network error: {e}")
-
+        return (host.hostname, 255, [], f"SSH/Network error: {e}", None)
+
+    # On failure past this point, the exception propagates without closing
+    # the client: it is pooled and may be shared with other threads, so
+    # close_all_connections() owns its lifecycle.
+    cmd = build_list_command(search, path_glob)
+    stdin, stdout, stderr = client.exec_command(cmd, timeout=timeout)
+    stdin.close()
+
+    # Stream line by line instead of read()-to-EOF: parsing overlaps the
+    # remote grep, and a host with thousands of matches never holds one
+    # giant output string.
+    paths = []
+    for raw in iter(stdout.readline, ""):
+        line = raw.strip()
+        if line:
+            paths.append(line)
+    err = stderr.read().decode(errors="replace")
+    exit_status = stdout.channel.recv_exit_status()
+
+    # The remote wrapper neutralises grep's no-match exit per batch and
+    # pipefail surfaces find failures, so a clean run exits 0 whether or
+    # not anything matched: report 1 when it simply found nothing. Any
+    # surviving non-zero status — xargs's 123 for a failed batch, find's
+    # 1 for a bad path — is a genuine failure; map it to grep's error
+    # code rather than letting find's 1 collide with "no matches".
+    if exit_status == 0 and not paths:
+        exit_status = 1
+    elif exit_status != 0:
+        exit_status = 2
+
+    return (host.hostname, exit_status, paths, err, client)
+
+def run_grep_and_download(host: HostConfig, search: str, path_glob: str, dest_root: str,
+                          timeout: int = 120) -> Tuple[str, int, List[str], str, Optional[paramiko.SSHClient], Optional[List[Tuple[str, str]]]]:
+    """
+    Fused fast path for --download 1: one remote command greps and tars the
+    matches, and the stream is extracted as it arrives. Matched paths are
+    recovered from the tar members themselves, so a matching host needs no
+    separate listing round trip.
+    Returns (hostname, exit_code, paths, stderr_text, client, downloaded).
+    downloaded is None when the fused pipeline could not be trusted (e.g. the
+    remote lacks xargs/tar support for it); the caller should then download
+    the returned paths the conventional way.
+    """
     try:
-        cmd = build_list_command(search, path_glob)
-        stdin, stdout, stderr = client.exec_command(cmd, timeout=timeout)
-        stdin.close()
+        client = connect_ssh(host, timeout)
+    except (paramiko.AuthenticationException, paramiko.SSHException, socket.error) as e:
+        return (host.hostname, 255, [], f"SSH/Network error: {e}", None, [])
 
-        out = stdout.read().decode(errors="replace")
-        err = stderr.read().decode(errors="replace")
-        exit_status = stdout.channel.recv_exit_status()
+    # On failure past this point, the exception propagates without closing
+    # the client: it is pooled and may be shared with other threads, so
+    # close_all_connections() owns its lifecycle.
+    cmd = build_download_command(search, path_glob)
+    stdin, stdout, stderr = client.exec_command(cmd, timeout=timeout)
+    stdin.close()
 
-        # Parse paths: each line is a full path to a file matched
-        paths = [line.strip() for line in out.splitlines() if line.strip()]
+    downloaded: List[Tuple[str, str]] = []
+    dest = os.path.join(dest_root, host.hostname)
+    try:
+        with tarfile.open(fileobj=stdout, mode="r|") as tf:
+            for member in tf:
+                _extract_member(tf, member, dest)
+                if member.isfile():
+                    name = member.name[2:] if member.name.startswith("./") else member.name
+                    rpath = "/" + name.lstrip("/")
+                    downloaded.append((rpath, os.path.join(dest, member.name)))
+    except tarfile.ReadError:
+        pass  # empty stream: xargs -r ran nothing, i.e. no matches
+
+    err = stderr.read().decode(errors="replace")
+    # tar always warns about stripping the leading '/'; that's expected,
+    # not something to surface per host.
+    err = "\n".join(l for l in err.splitlines() if "Removing leading" not in l)
+    exit_status = stdout.channel.recv_exit_status()
+    paths = [rpath for rpath, _ in downloaded]
+
+    if exit_status == 0:
+        # Clean run: no-match exits are neutralised remotely, so matched
+        # vs not is decided by what the stream contained.
+        return (host.hostname, 0 if paths else 1, paths, err, client, downloaded)
+
+    # Pipeline failed (grep error, no GNU xargs/tar, --null unsupported,
+    # ...): fall back to the plain listing; the caller downloads those
+    # paths via the tar/SFTP path.
+    hostname, exit_status, paths, err2, client = run_list_on_host(host, search, path_glob, timeout)
+    return (hostname, exit_status, paths, err + err2, client, None)
+
+def _extract_member(tf: tarfile.TarFile, member: tarfile.TarInfo, dest: str) -> None:
+    """
+    Extract one tar member, refusing anything that could escape dest: the
+    member names come from the remote, so a compromised host must not be able
+    to write outside its own directory via '..' or absolute names.
+    """
+    try:
+        tf.extract(member, path=dest, filter="data")
+    except TypeError:
+        # Interpreter predates extraction filters: enforce the same name
+        # hygiene ourselves before extracting.
+        if member.name.startswith("/") or ".." in member.name.split("/"):
+            raise RuntimeError(f"unsafe tar member name: {member.name!r}")
+        tf.extract(member, path=dest)
+
+def tar_download_files(host: HostConfig, paths: List[str], dest_root: str, timeout: int = 120,
+                       client: Optional[paramiko.SSHClient] = None) -> List[Tuple[str, str]]:
+    """
+    Download all remote paths in one remote 'tar -cf -' stream, extracted into
+    dest_root/hostname/<full-remote-path>.
+    One exec and one continuous channel instead of an SFTP OPEN/READ/CLOSE
+    round-trip per file, which is what hurts with many small matches.
+    Returns a list of (remote_path, local_path); raises on any tar/stream error
+    so the caller can fall back to per-file SFTP.
+    """
+    if client is None:
+        client = connect_ssh(host, timeout)
 
-        return (host.hostname, exit_status, paths, err)
-    finally:
-        try:
-            client.close()
-        except Exception:
-            pass
+    cmd = "cd / && tar -cf - " + " ".join(shlex.quote(p.lstrip("/")) for p in paths)
+    stdin, stdout, stderr = client.exec_command(cmd, timeout=timeout)
+    stdin.close()
+
+    downloaded = []
+    dest = os.path.join(dest_root, host.hostname)
+    with tarfile.open(fileobj=stdout, mode="r|") as tf:
+        for member in tf:
+            _extract_member(tf, member, dest)
+            if member.isfile():
+                name = member.name[2:] if member.name.startswith("./") else member.name
+                rpath = "/" + name.lstrip("/")
+                downloaded.append((rpath, os.path.join(dest, member.name)))
+
+    exit_status = stdout.channel.recv_exit_status()
+    if exit_status != 0:
+        err = stderr.read().decode(errors="replace")
+        raise RuntimeError(f"remote tar exited {exit_status}: {err.strip()}")
+    return downloaded
 
-def sftp_download_files(host: HostConfig, paths: List[str], dest_root: str, timeout: int = 120) -> List[Tuple[str, str]]:
+def download_files(host: HostConfig, paths: List[str], dest_root: str, timeout: int = 120,
+                   client: Optional[paramiko.SSHClient] = None,
+                   sftp_requests: int = 64) -> List[Tuple[str, str]]:
+    """
+    Download matched files from a host: try the batched tar stream first and
+    fall back to per-file SFTP if the remote tar is missing or fails.
+    """
+    try:
+        return tar_download_files(host, paths, dest_root, timeout=timeout, client=client)
+    except (paramiko.AuthenticationException, paramiko.SSHException, socket.error) as e:
+        print(f"[ERROR] {host.hostname}: download connect failed: {e}", file=sys.stderr)
+        return []
+    except Exception as e:
+        print(f"[WARN] {host.hostname}: tar download failed ({e}); falling back to SFTP",
+              file=sys.stderr)
+        return sftp_download_files(host, paths, dest_root, timeout=timeout,
+                                   client=client, sftp_requests=sftp_requests)
+
+def sftp_download_files(host: HostConfig, paths: List[str], dest_root: str, timeout: int = 120,
+                        client: Optional[paramiko.SSHClient] = None,
+                        sftp_requests: int = 64) -> List[Tuple[str, str]]:
     """
     Download each remote path via SFTP to local dest_root/hostname/<full-remote-path>.
     Creates directories as needed.
+    Reuses an already-connected client when given one (avoids a second SSH
+    handshake); otherwise connects on its own.
+    sftp_requests caps how many read requests are prefetched per file: enough
+    in flight to hide WAN round-trips, bounded so huge files can't queue
+    unlimited requests.
+    Files are fetched by a small thread pool, each thread on its own SFTP
+    channel multiplexed over the one transport, so several files are in
+    flight at once.
     Returns a list of (remote_path, local_path) for successfully downloaded files.
     """
-    downloaded = []
+    downloaded: List[Tuple[str, str]] = []
+    if not paths:
+        return downloaded
     try:
-        client = connect_ssh(host, timeout)
-        sftp = client.open_sftp()
+        if client is None:
+            client = connect_ssh(host, timeout)
     except (paramiko.AuthenticationException, paramiko.SSHException, socket.error) as e:
         print(f"[ERROR] {host.hostname}: SFTP connect failed: {e}", file=sys.stderr)
         return downloaded
 
-    try:
-        for rpath in paths:
-            # Build local target path: dest_root/hostname/<full remote path...>
-            local_path = os.path.join(dest_root, host.hostname, rpath.lstrip("/"))
-            local_dir = os.path.dirname(local_path)
-            os.makedirs(local_dir, exist_ok=True)
+    lock = threading.Lock()
+    sftps: List[paramiko.SFTPClient] = []
+    tls = threading.local()
 
-            try:
-                sftp.get(rpath, local_path)
+    def fetch(rpath: str) -> None:
+        # One SFTP channel per worker thread: channels multiplex on the shared
+        # transport, but a single channel must not be used concurrently.
+        sftp = getattr(tls, "sftp", None)
+        if sftp is None:
+            sftp = tls.sftp = client.open_sftp()
+            with lock:
+                sftps.append(sftp)
+
+        # Build local target path: dest_root/hostname/<full remote path...>
+        local_path = os.path.join(dest_root, host.hostname, rpath.lstrip("/"))
+
+        try:
+            sftp.get(rpath, local_path, prefetch=True,
+                     max_concurrent_prefetch_requests=sftp_requests)
+            with lock:
                 downloaded.append((rpath, local_path))
-            except FileNotFoundError:
-                print(f"[WARN] {host.hostname}: Remote file not found: {rpath}", file=sys.stderr)
-            except PermissionError:
-                print(f"[WARN] {host.hostname}: Permission denied: {rpath}", file=sys.stderr)
-            except Exception as e:
-                print(f"[WARN] {host.hostname}: Failed to download {rpath}: {e}", file=sys.stderr)
+        except FileNotFoundError:
+            print(f"[WARN] {host.hostname}: Remote file not found: {rpath}", file=sys.stderr)
+        except PermissionError:
+            print(f"[WARN] {host.hostname}: Permission denied: {rpath}", file=sys.stderr)
+        except Exception as e:
+            print(f"[WARN] {host.hostname}: Failed to download {rpath}: {e}", file=sys.stderr)
+
+    # Create target directories up front, once per unique parent: with many
+    # matches in the same remote directory this collapses one makedirs walk
+    # per file into one per directory, off the download threads' critical path.
+    parents = {
+        os.path.dirname(os.path.join(dest_root, host.hostname, rpath.lstrip("/")))
+        for rpath in paths
+    }
+    for parent in parents:
+        os.makedirs(parent, exist_ok=True)
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(SFTP_WORKERS, len(paths))) as pool:
+            for rpath in paths:
+                pool.submit(fetch, rpath)
     finally:
-        try:
-            sftp.close()
-        except Exception:
-            pass
-        try:
-            client.close()
-        except Exception:
-            pass
+        # Only the SFTP channels are ours to close; the client may be shared
+        # with the grep step and is closed by the caller.
+        for sftp in sftps:
+            try:
+                sftp.close()
+            except Exception:
+                pass
 
     return downloaded
 
@@ -160,53 +558,72 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--path", required=True, help="Remote path or glob pattern (e.g., /var/.../ssnnMAB0076*)")
     parser.add_argument("--download", type=int, choices=[0, 1], default=0, help="If 1, download matching files.")
     parser.add_argument("--dest", default="downloads", help="Local destination root for downloads (default: downloads).")
-    parser.add_argument("--parallel", type=int, default=4, help="Number of parallel SSH sessions (default: 4).")
+    parser.add_argument("--parallel", type=int, default=None, help="Number of parallel SSH sessions (default: one per host, capped at 32).")
+    parser.add_argument("--sftp-requests", type=int, default=64, help="Max concurrent SFTP prefetch requests per file (default: 64).")
+    parser.add_argument("--sftp-chunk", type=int, default=1024 * 1024, help="SFTP read request size in bytes (default: 1 MiB; use 32768 if the server rejects large reads).")
     parser.add_argument("--timeout", type=int, default=120, help="Per-host SSH/command timeout seconds (default: 120).")
     return parser.parse_args()
 
 def load_hosts(config_path: str) -> List[HostConfig]:
-    with open(config_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    hosts: List[HostConfig] = []
-    for entry in data:
-        hosts.append(
-            HostConfig(
-                hostname=entry["hostname"],
-                ip=entry["ip"],
-                username=entry["username"],
-                password=entry["password"],
-                port=int(entry.get("port", 22)),
-            )
+    with open(config_path, "rb") as f:
+        raw = f.read()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    # "ip" is optional: fall back to a fresh cache entry from a previous run,
+    # then to DNS as the last resort (short-circuited, so DNS only runs when
+    # neither config nor cache has the address).
+    # Interning hostname/username collapses the many duplicate strings a big
+    # inventory carries (same admin user everywhere) into shared objects.
+    hosts = [
+        HostConfig(
+            hostname=sys.intern(entry["hostname"]),
+            ip=entry.get("ip") or cached_ip(entry["hostname"]) or socket.gethostbyname(entry["hostname"]),
+            username=sys.intern(entry["username"]),
+            password=entry["password"],
+            port=int(entry.get("port", 22)),
         )
+        for entry in data
+    ]
     if not hosts:
         raise ValueError("No hosts found in config.")
     return hosts
 
+# Serialises host result blocks so concurrently finishing hosts never
+# interleave their output.
+_stdout_lock = threading.Lock()
+
 def print_host_results(hostname: str, exit_code: int, paths: List[str], err: str) -> None:
+    # Assemble the whole block first and emit it as one write: a single
+    # syscall per host instead of one per line, and the lock keeps each
+    # host's block contiguous.
     sep = "=" * 80
-    print(f"\n{sep}\nHost: {hostname}\nExit: {exit_code}\n{sep}")
+    buf = io.StringIO()
+    buf.write(f"\n{sep}\nHost: {hostname}\nExit: {exit_code}\n{sep}\n")
     if paths:
-        print("Matched files:")
+        buf.write("Matched files:\n")
         for p in paths:
-            print(f"  Host: {hostname} | Path: {p}")
+            buf.write(f"  Host: {hostname} | Path: {p}\n")
     else:
-        print("Matched files: (none)")
+        buf.write("Matched files: (none)\n")
     if err.strip():
-        print(f"\n[stderr]\n{err.rstrip()}")
+        buf.write(f"\n[stderr]\n{err.rstrip()}\n")
 
     if exit_code == 0:
-        print(f"\n[INFO] Matches found on {hostname}.")
+        buf.write(f"\n[INFO] Matches found on {hostname}.\n")
     elif exit_code == 1:
-        print(f"\n[INFO] No matches found on {hostname}.")
+        buf.write(f"\n[INFO] No matches found on {hostname}.\n")
     elif exit_code == 2:
-        print(f"\n[WARN] Grep reported an error on {hostname} (exit 2).")
+        buf.write(f"\n[WARN] Grep reported an error on {hostname} (exit 2).\n")
     elif exit_code == 255:
-        print(f"\n[ERROR] SSH/Network failure contacting {hostname}.")
+        buf.write(f"\n[ERROR] SSH/Network failure contacting {hostname}.\n")
     else:
-        print(f"\n[WARN] Non-zero exit code {exit_code} on {hostname}.")
+        buf.write(f"\n[WARN] Non-zero exit code {exit_code} on {hostname}.\n")
+
+    with _stdout_lock:
+        sys.stdout.write(buf.getvalue())
 
 def main() -> int:
     args = parse_args()
+    load_host_cache()
     try:
         hosts = load_hosts(args.config)
 
@@ -214,40 +631,105 @@ def main() -> int:
         print(f"[FATAL] Could not load config: {e}", file=sys.stderr)
         return 2
 
+    # SSH work is pure I/O wait, so default to one worker per host (capped so
+    # huge fleets don't exhaust local FDs or trip remote MaxStartups).
+    if not args.parallel:
+        args.parallel = min(len(hosts), 32)
+    if resource is not None:
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if args.parallel * 4 > soft:
+            print(f"[WARN] --parallel {args.parallel} may exhaust the open-file limit "
+                  f"(soft limit {soft}); consider raising ulimit -n.", file=sys.stderr)
+
+    # Paramiko hard-codes 32 KB SFTP read requests, which costs a round-trip
+    # per 32 KB; bigger requests mean far fewer round-trips per byte. Class
+    # attribute, so patch once before any SFTP client exists.
+    paramiko.sftp_file.SFTPFile.MAX_REQUEST_SIZE = max(args.sftp_chunk, 1)
+
     results = []
     downloads_summary = []
 
-    with ThreadPoolExecutor(max_workers=max(args.parallel, 1)) as pool:
-        futures = {
-            pool.submit(run_list_on_host, host, args.search, args.path, args.timeout): host
-            for host in hosts
-        }
+    def report_downloads(hostname: str, dl: List[Tuple[str, str]]) -> None:
+        if dl:
+            print("\nDownloaded files:")
+            for r, l in dl:
+                print(f"  Host: {hostname} | Remote: {r} -> Local: {l}")
+        downloads_summary.extend((hostname, r, l) for r, l in dl)
 
-        for fut in as_completed(futures):
-            host = futures[fut]
-            try:
-                hostname, exit_code, paths, err = fut.result()
-            except Exception as e:
-                hostname = host.hostname
-                exit_code, paths, err = 255, [], f"Unhandled exception: {e}"
-
-            print_host_results(hostname, exit_code, paths, err)
-            results.append((hostname, exit_code, len(paths)))
-
-            # If requested, download files that matched
-            if args.download == 1 and exit_code == 0 and paths:
-                dl = sftp_download_files(host, paths, args.dest, timeout=args.timeout)
-                if dl:
-                    print("\nDownloaded files:")
-                    for r, l in dl:
-                        print(f"  Host: {hostname} | Remote: {r} -> Local: {l}")
-                downloads_summary.extend((hostname, r, l) for r, l in dl)
-
-    # Summary
+    try:
+        # Host fan-out stays on threads rather than an asyncio event loop:
+        # paramiko's blocking API underpins the transport tuning and the
+        # connection reuse above, the work is pure I/O wait (threads idle in
+        # recv, no CPU contention), and --parallel already scales the pool.
+        # Fallback downloads go to a second pool so the results loop keeps
+        # draining grep futures while earlier hosts are still transferring.
+        with ThreadPoolExecutor(max_workers=max(args.parallel, 1)) as pool, \
+                ThreadPoolExecutor(max_workers=max(args.parallel, 1)) as dl_pool:
+            if args.download == 1:
+                # Fused grep+tar per host: the worker both lists and downloads
+                # in a single remote exec.
+                futures = {
+                    pool.submit(run_grep_and_download, host, args.search, args.path,
+                                args.dest, args.timeout): host
+                    for host in hosts
+                }
+            else:
+                futures = {
+                    pool.submit(run_list_on_host, host, args.search, args.path, args.timeout): host
+                    for host in hosts
+                }
+
+            dl_futures = {}
+            for fut in as_completed(futures):
+                host = futures[fut]
+                dl_done = None
+                try:
+                    if args.download == 1:
+                        hostname, exit_code, paths, err, client, dl_done = fut.result()
+                    else:
+                        hostname, exit_code, paths, err, client = fut.result()
+                except Exception as e:
+                    hostname = host.hostname
+                    exit_code, paths, err, client = 255, [], f"Unhandled exception: {e}", None
+
+                print_host_results(hostname, exit_code, paths, err)
+                results.append((hostname, exit_code, len(paths)))
+
+                # If requested, report the fused download, or hand the
+                # conventional download to the second pool when the fused
+                # pipeline couldn't run, so this loop keeps draining grep
+                # futures instead of transferring inline.
+                if args.download == 1 and exit_code == 0 and paths:
+                    if dl_done is not None:
+                        report_downloads(hostname, dl_done)
+                    else:
+                        dl_fut = dl_pool.submit(download_files, host, paths, args.dest,
+                                                timeout=args.timeout, client=client,
+                                                sftp_requests=args.sftp_requests)
+                        dl_futures[dl_fut] = hostname
+
+            for fut in as_completed(dl_futures):
+                hostname = dl_futures[fut]
+                try:
+                    dl = fut.result()
+                except Exception as e:
+                    print(f"[WARN] {hostname}: download failed: {e}", file=sys.stderr)
+                    dl = []
+                report_downloads(hostname, dl)
+    finally:
+        close_all_connections()
+        save_host_cache()
+
+    # Summary: one pass over the results instead of one generator sweep per counter
     total_hosts = len(results)
-    matched_hosts = sum(1 for _, code, cnt in results if code == 0 and cnt > 0)
-    no_match_hosts = sum(1 for _, code, cnt in results if code == 1 or cnt == 0)
-    error_hosts = sum(1 for _, code, _ in results if code not in (0, 1))
+    matched_hosts = no_match_hosts = error_hosts = 0
+    for _, code, cnt in results:
+        if code == 0 and cnt > 0:
+            matched_hosts += 1
+        if code == 1 or cnt == 0:
+            no_match_hosts += 1
+        if code not in (0, 1):
+            error_hosts += 1
 
     print("\nSummary:")
     print(f"  Hosts total : {total_hosts}")